@@ -0,0 +1,25 @@
+import shutil
+from pathlib import Path
+
+from vix_downloader import convert_vtt
+
+DATA = Path(__file__).parent / "data"
+
+
+def test_convert_vtt(tmp_path):
+    vtt = tmp_path / "ep.es.vtt"
+    srt = tmp_path / "ep.es.srt"
+    shutil.copy(DATA / "sample.vtt", vtt)
+
+    assert convert_vtt(vtt, srt)
+    assert srt.read_text(encoding="utf-8") == (DATA / "sample.srt").read_text(encoding="utf-8")
+    assert not vtt.exists()
+
+
+def test_convert_vtt_without_cues_keeps_vtt(tmp_path):
+    vtt = tmp_path / "ep.es.vtt"
+    srt = tmp_path / "ep.es.srt"
+    vtt.write_text("WEBVTT\n\nNOTE nada\n", encoding="utf-8")
+
+    assert not convert_vtt(vtt, srt)
+    assert vtt.exists() and not srt.exists()
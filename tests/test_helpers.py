@@ -0,0 +1,20 @@
+from vix_downloader import ascii_fold, extract_card_meta, slug
+
+
+def test_extract_card_meta():
+    assert extract_card_meta("EP. 12\nLa boda") == (12, "La boda")
+    assert extract_card_meta("Ep 7 - Regreso") == (7, "- Regreso")
+    assert extract_card_meta("La boda") == (-1, "La boda")
+    assert extract_card_meta("EP 3") == (3, "Episode")
+    assert extract_card_meta("") == (-1, "Episode")
+
+
+def test_ascii_fold():
+    assert ascii_fold("plain") == "plain"
+    assert ascii_fold("Él niño") == "El nino"
+
+
+def test_slug():
+    assert slug("La Reina del Sur: Temporada 1") == "La Reina del Sur_ Temporada 1"
+    assert slug("¿Quién mató?") == "Quien mato"
+    assert slug("a//b") == "a_b"
@@ -0,0 +1,29 @@
+import csv
+import io
+import queue
+import threading
+
+from vix_downloader import record_results
+
+
+def test_record_results_batches_until_sentinel():
+    titles, fails = io.StringIO(), io.StringIO()
+    results = queue.Queue()
+    for item in (
+        ("ok", ["S01E001", "Piloto", "Serie.S01E001.mp4"]),
+        ("fail", "S01E002,https://vix.com/e2,NO_MPD\n"),
+        ("ok", ["S01E003", "Tres", "Serie.S01E003.mp4"]),
+        None,
+    ):
+        results.put(item)
+
+    t = threading.Thread(target=record_results, args=(results, csv.writer(titles), titles, fails, 0))
+    t.start()
+    t.join(5)
+
+    assert not t.is_alive()
+    assert list(csv.reader(io.StringIO(titles.getvalue()))) == [
+        ["S01E001", "Piloto", "Serie.S01E001.mp4"],
+        ["S01E003", "Tres", "Serie.S01E003.mp4"],
+    ]
+    assert fails.getvalue() == "S01E002,https://vix.com/e2,NO_MPD\n"
@@ -0,0 +1,49 @@
+import csv
+
+from vix_downloader import PART_DIR, previously_done, publish_download
+
+
+def test_previously_done(tmp_path):
+    titles = tmp_path / "titles.csv"
+    with titles.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["S01E001", "Piloto", "Serie.S01E001.mp4"])
+        # Quoted newline: one row over two lines
+        w.writerow(["s01e002", "Dos\nlíneas", "Serie.S01E002.mp4"])
+    (tmp_path / "Serie.S01E003.mp4").write_bytes(b"x")
+    (tmp_path / "Serie.S01E004.mp4").write_bytes(b"") # interrupted run
+    (tmp_path / "Serie.S01E005.es.srt").write_bytes(b"x")
+
+    assert previously_done(tmp_path, titles) == {"S01E001", "S01E002", "S01E003"}
+
+
+def test_previously_done_without_titles(tmp_path):
+    assert previously_done(tmp_path, tmp_path / "titles.csv") == set()
+
+
+def test_publish_download(tmp_path):
+    stub = tmp_path / "Serie.S01EUNK_Foo"
+    own = tmp_path / PART_DIR / stub.name
+    sibling = tmp_path / PART_DIR / "Serie.S01EUNK_Foo.Bar"
+    own.mkdir(parents=True)
+    sibling.mkdir()
+    for name in ("Serie.S01EUNK_Foo.mp4", "Serie.S01EUNK_Foo.es.vtt"):
+        (own / name).write_bytes(b"x")
+    (sibling / "Serie.S01EUNK_Foo.Bar.mp4").write_bytes(b"x")
+
+    assert publish_download(stub)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        PART_DIR, "Serie.S01EUNK_Foo.es.vtt", "Serie.S01EUNK_Foo.mp4",
+    ]
+    assert not own.exists()
+    assert (sibling / "Serie.S01EUNK_Foo.Bar.mp4").exists()
+
+
+def test_publish_download_without_output(tmp_path):
+    stub = tmp_path / "Serie.S01E001"
+    assert not publish_download(stub) # no part dir at all
+
+    (tmp_path / PART_DIR / stub.name).mkdir(parents=True)
+    (tmp_path / PART_DIR / stub.name / "Serie.S01E001.es.vtt").write_bytes(b"x")
+    assert not publish_download(stub) # subtitles but no video
+    assert not (tmp_path / "Serie.S01E001.es.vtt").exists()
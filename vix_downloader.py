@@ -4,10 +4,17 @@ Robust **ViX season ripper** – **v1**
 =======================================
 """
 from __future__ import annotations
-import argparse, csv, json, logging, re, subprocess, time
+import argparse, csv, html, logging, queue, re, shutil, subprocess, threading, time
+import multiprocessing as mp, os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.util import Finalize
 from pathlib import Path
+from urllib.parse import urlsplit
 from typing import List, Set, Tuple
 
+import trio # installed with selenium 4 (drives the CDP websocket)
 from unidecode import unidecode
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -23,15 +30,37 @@ from selenium.common.exceptions import (
 ###############################################################################
 SAFE = "-_.() abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
 MPD_TIMEOUT = 45  # seconds
+PART_DIR = ".part"  # work area in --out; finished files are moved up out of it
+MIN_INTERVAL = 2.0  # seconds between episode navigations, across all workers
+SPA_NAV_TIMEOUT = 10  # seconds to wait for the MPD after a client-side route change
+DL_THREADS = 8  # segments N_m3u8DL-RE fetches concurrently per download
+DL_POLL = 0.5  # seconds between checks for finished downloads
+SUB_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))  # concurrent subtitle conversions
+WRITE_BUFFER = 1 << 16  # titles.csv / failures.log buffer; one write() per batch of results
+SUB_RETRIES = 3  # attempts per subtitle conversion on I/O errors
+
+# ascii_fold() output is pure ASCII, so a 128-entry table covers every char
+_SAFE_TABLE = {i: chr(i) if chr(i) in SAFE else "_" for i in range(128)}
+_SLUG_UND = re.compile(r"_+")
+# split() yields [text, num, text, num, ..., text]: number and title in one regex pass
+_EP_SPLIT = re.compile(r"EP\.?\s*(\d+)", re.I)
+_SEASON_EP = re.compile(r"(S\d{2}E\d{3})", re.I)
+_VTT_BLOCK_SEP = re.compile(r"\n[ \t]*\n")
+_VTT_TIMING = re.compile(r"\s*((?:\d+:)?\d{2}:\d{2}\.\d{3})\s+-->\s+((?:\d+:)?\d{2}:\d{2}\.\d{3})")
+_VTT_CLASSED = re.compile(r"<([ibu])\.[^>]*>") # <i.foo> -> <i>, so the closing </i> keeps its pair
+_VTT_TAG = re.compile(r"<(?!/?[ibu]>)[^>]*>") # Voice/class/timestamp tags; SRT keeps only <i>/<b>/<u>
+
+def ascii_fold(txt: str) -> str:
+    # Skip the transliterator for text that is already plain ASCII
+    return txt if txt.isascii() else unidecode(txt)
 
 def slug(txt: str) -> str:
-    txt = unidecode(txt)
-    txt = "".join(c if c in SAFE else "_" for c in txt)
-    return re.sub(r"_+", "_", txt).strip("_ ")
+    txt = ascii_fold(txt).translate(_SAFE_TABLE)
+    return _SLUG_UND.sub("_", txt).strip("_ ")
 
-def run(cmd: list[str]) -> int:
+def spawn(cmd: list[str]) -> subprocess.Popen:
     logging.debug("EXEC: %s", " ".join(cmd))
-    return subprocess.call(cmd, shell=False)
+    return subprocess.Popen(cmd, shell=False)
 
 ###############################################################################
 # --------------------------- selenium utils -------------------------------- #
@@ -41,68 +70,214 @@ def make_driver(headless: bool = False) -> webdriver.Chrome:
     if headless:
         opts.add_argument("--headless=new")
     opts.add_argument("--disable-gpu")
+    # /dev/shm is tiny in containers; with several Chromes alive it makes tabs crash
+    opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--lang=es-ES,es")
-    opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
-    opts.set_capability("goog:perfLoggingPrefs", {"enableNetwork": True})
+    # We only need the player JS to fire the MPD request – skip images and background features
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+    opts.add_argument("--disable-features=TranslateUI,MediaRouter,OptimizationHints")
+    # drv.get() returns at DOMContentLoaded; callers wait for what they need explicitly
+    opts.page_load_strategy = "eager"
+    opts.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
     d = webdriver.Chrome(options=opts)
     d.set_page_load_timeout(60)
     return d
 
+# Sub-resources the episode page never needs for us to sniff its MPD
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.woff*", "*.css",
+    "*/analytics/*", "*doubleclick*", "*googletagmanager*",
+]
+
+def block_heavy_resources(drv: webdriver.Chrome):
+    # Only for episode drivers: the listing page needs CSS to lay out and lazy-load its cards
+    try:
+        drv.execute_cdp_cmd("Network.enable", {})
+        drv.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    except WebDriverException as e:
+        logging.warning("Could not block heavy resources: %s", e)
+
+# Client-side route change through the loaded app's Next.js router. Returns
+# false when there is no router to ask or the link is on another origin (a bare
+# pushState + popstate is ignored by Next without its own history state).
+SPA_NAVIGATE_JS = """
+const url = arguments[0];
+if (location.origin !== new URL(url).origin) return false;
+if (!(window.next && window.next.router && window.next.router.push)) return false;
+window.next.router.push(url);
+return true;
+"""
+
+PLAYER_READY_JS = (
+    "return document.readyState !== 'loading'"
+    " && !!document.querySelector('video, [data-testid*=player]');"
+)
+
+def spa_navigate(drv: webdriver.Chrome, link: str) -> bool:
+    """Routes to link without a document reload; False if it could not even try."""
+    try:
+        return bool(drv.execute_script(SPA_NAVIGATE_JS, link))
+    except WebDriverException as e:
+        logging.debug("Client-side navigation failed: %s", e)
+        return False
+
 def wait_css(drv: webdriver.Chrome, selector: str, sec: int = 20):
     return WebDriverWait(drv, sec).until(
         EC.presence_of_element_located((By.CSS_SELECTOR, selector))
     )
 
+def wait_for(drv: webdriver.Chrome, cond, sec: float = 5) -> bool:
+    """WebDriverWait(...).until(cond) that returns False on timeout instead of raising."""
+    try:
+        WebDriverWait(drv, sec, poll_frequency=0.1).until(cond)
+        return True
+    except TimeoutException:
+        return False
+
 def js_click(drv: webdriver.Chrome, el):
-    drv.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
+    # Scroll + click in one round-trip
     try:
-        drv.execute_script("arguments[0].click();", el)
+        drv.execute_script(
+            "arguments[0].scrollIntoView({block:'center'}); arguments[0].click();", el
+        )
     except Exception:
         el.send_keys(Keys.ENTER)
 
-def safe_get_attr(drv: webdriver.Chrome, el, attr: str):
-    try:
-        return drv.execute_script(
-            "return arguments[0]?.getAttribute(arguments[1]);", el, attr
-        )
-    except StaleElementReferenceException:
-        return None
+# Runs the whole scroll-and-collect loop inside the page (execute_async_script),
+# so a range costs one round-trip instead of several per scroll step.
+# Args: container selector, card selector, max scrolls. Resolves with
+# {rows: [[href, text], ...], scrolls, reason}; text is the enclosing
+# role=button card's innerText.
+SCROLL_COLLECT_JS = """
+const [contSel, cardSel, maxScrolls, done] = arguments;
+const seen = new Map();
+const sleep = ms => new Promise(r => setTimeout(r, ms));
+const cards = () => {
+    const cont = document.querySelector(contSel);
+    return cont ? cont.querySelectorAll(cardSel) : [];
+};
+const harvest = () => {
+    const found = cards();
+    found.forEach(a => {
+        if (a.href && !seen.has(a.href)) {
+            const btn = a.closest('div[role="button"]');
+            seen.set(a.href, (btn ? btn.innerText : a.innerText) || '');
+        }
+    });
+    return found.length;
+};
+(async () => {
+    let stagnant = 0, scrolls = 0, reason = 'max scrolls';
+    while (scrolls < maxScrolls) {
+        const n = harvest();
+        const y = window.pageYOffset, h = document.body.scrollHeight;
+        // Scroll down by 80% of the viewport height
+        window.scrollBy(0, window.innerHeight * 0.8);
+        scrolls++;
+        // Give content triggered by the scroll up to 2 s to load, moving on as soon as it does
+        for (let t = 0; t < 2000; t += 100) {
+            await sleep(100);
+            if (document.body.scrollHeight > h || cards().length !== n) break;
+        }
+        const ny = window.pageYOffset, nh = document.body.scrollHeight;
+        if (ny > y + 5 || nh > h) {
+            stagnant = 0; // Scrolled down or new content loaded – progress likely
+        } else if (ny + window.innerHeight >= nh - 10) {
+            reason = 'bottom reached';
+            break;
+        } else if (++stagnant >= 5) {
+            reason = 'stagnant';
+            break;
+        }
+    }
+    harvest();
+    done({rows: Array.from(seen.entries()), scrolls, reason});
+})().catch(e => done({rows: Array.from(seen.entries()), scrolls: -1, reason: String(e)}));
+"""
 
 ###############################################################################
 # --------------------------- workflow -------------------------------------- #
 ###############################################################################
+RANGE_BUTTON_SEL = 'button[aria-label="Selected Item"]'
+SCROLL_CONTAINER_SEL = 'div.ContentList_container__cV53J'
+# Make card selector slightly more specific if possible, but keep it simple for now
+CARD_SEL = 'a.Card_link__M4ZXt[href]' # Ensure it has an href attribute
+LISTBOX_SEL = 'ul[role="listbox"]'
+
+# href of the first card in the container (null if none) – changes when the list re-renders
+FIRST_CARD_JS = """
+const cont = document.querySelector(arguments[0]);
+const a = cont && cont.querySelector(arguments[1]);
+return a ? a.href : null;
+"""
+
+def first_card_href(drv: webdriver.Chrome, cont_sel: str, card_sel: str) -> str | None:
+    try:
+        return drv.execute_script(FIRST_CARD_JS, cont_sel, card_sel)
+    except WebDriverException:
+        return None
+
+def wait_cards_changed(drv: webdriver.Chrome, old_href: str | None, sec: float = 8) -> bool:
+    """Waits until the episode list re-renders (its first card changes)."""
+    return wait_for(
+        drv, lambda d: first_card_href(d, SCROLL_CONTAINER_SEL, CARD_SEL) not in (None, old_href), sec
+    )
+
+# First element matching the CSS selector whose whitespace-normalised text
+# equals the label (replaces per-label XPath text() lookups)
+FIND_BY_TEXT_JS = """
+const norm = s => (s || '').replace(/\\s+/g, ' ').trim();
+return Array.from(document.querySelectorAll(arguments[0]))
+    .find(el => norm(el.textContent) === arguments[1]) || null;
+"""
+
+def find_by_text(drv: webdriver.Chrome, selector: str, label: str):
+    return drv.execute_script(FIND_BY_TEXT_JS, selector, label)
+
 def prepare_season(drv: webdriver.Chrome, season: int):
     try:
         btn = wait_css(drv, 'button[aria-haspopup="listbox"]', 7)
+        shown = btn.text.strip() # Season currently on screen
+        old_href = first_card_href(drv, SCROLL_CONTAINER_SEL, CARD_SEL)
         js_click(drv, btn)
+        wait_for(drv, EC.presence_of_element_located((By.CSS_SELECTOR, '[role="option"], li')), 3)
         for opt in drv.find_elements(By.CSS_SELECTOR, '[role="option"], li'):
             if re.search(fr"\b{season}\b", opt.text):
+                # Plain <li> options carry no aria-selected; the button label tells us then
+                already_selected = (opt.get_attribute("aria-selected") == "true"
+                                    or opt.text.strip() == shown)
                 js_click(drv, opt)
-                time.sleep(1)
+                if not already_selected:
+                    wait_cards_changed(drv, old_href, 5)
                 return
     except TimeoutException:
         logging.info("No season selector – assuming single season.")
 
 def click_range(drv: webdriver.Chrome, label: str):
-    btn = wait_css(drv, 'button[aria-label="Selected Item"]', 5)
+    btn = wait_css(drv, RANGE_BUTTON_SEL, 5)
+    old_href = first_card_href(drv, SCROLL_CONTAINER_SEL, CARD_SEL)
     for _ in range(3):
         js_click(drv, btn)
         try:
-            xpath = f'//div[@role="button" and normalize-space(text())="{label}"]'
-            opt = drv.find_element(By.XPATH, xpath)
+            # Waiting for the option doubles as the retry back-off
+            opt = WebDriverWait(drv, 2).until(
+                lambda d: find_by_text(d, 'div[role="button"]', label)
+            )
             js_click(drv, opt)
-            time.sleep(2)
+            wait_cards_changed(drv, old_href)
             return
         except (WebDriverException, StaleElementReferenceException):
-            time.sleep(0.6)
+            continue
     raise RuntimeError(f"could not click range '{label}'")
 
-def extract_card_meta(card) -> Tuple[int, str]:
-    # (Keep this function as is)
-    raw = (card.text or "").replace("\n", " ")
-    m = re.search(r"EP\.?\s*(\d+)", raw, re.I)
-    ep_num = int(m.group(1)) if m else -1
-    title = re.sub(r"EP\.?\s*\d+", "", raw, flags=re.I).strip() or "Episode"
+def extract_card_meta(text: str) -> Tuple[int, str]:
+    # Parses the card's innerText (as collected by SCROLL_COLLECT_JS)
+    parts = _EP_SPLIT.split((text or "").replace("\n", " "))
+    ep_num = int(parts[1]) if len(parts) > 1 else -1
+    title = "".join(parts[0::2]).strip() or "Episode"
     # Add a little robustness for missing titles
     if not title and ep_num != -1:
         title = f"Episode {ep_num}"
@@ -118,173 +293,63 @@ def scroll_and_extract_metadata(
     max_scrolls: int = 100 # Increased max scrolls just in case
 ) -> int:
     """
-    Scrolls the WINDOW, finds new cards within the specific container,
-    extracts metadata, and adds them to the all_cards_data dictionary.
+    Scrolls the WINDOW until no new cards load (entirely in-page, see
+    SCROLL_COLLECT_JS), extracts metadata for the cards within the specific
+    container, and adds them to the all_cards_data dictionary.
     Returns the number of new items added in this pass.
     """
     newly_added_count = 0
-    stagnant_scroll_attempts = 0 # Counter for attempts where scroll position didn't change
-    processed_in_this_scroll: Set[str] = set() # Track hrefs processed in the *entire* scroll operation for this range
 
     logging.info("Starting scroll/extract loop for current range...")
 
-    for scroll_attempt in range(max_scrolls):
-        # Get current scroll position *before* doing anything else
-        try:
-            current_scroll_y = drv.execute_script("return window.pageYOffset;")
-        except WebDriverException as e:
-             logging.warning("Could not get current scroll position: %s. Stopping scroll.", e)
-             break
+    # Container may still be rendering right after a range switch
+    if not wait_for(drv, EC.presence_of_element_located((By.CSS_SELECTOR, cont_sel)), 3):
+        # If container disappears maybe content loaded differently? Less critical now.
+        logging.warning("Could not find scroll container '%s' (might be okay if window scrolled)", cont_sel)
 
-        cont = None
-        try:
-            # Still need the container to find elements within it accurately
-            cont = drv.find_element(By.CSS_SELECTOR, cont_sel)
-        except Exception:
-            try:
-                cont = wait_css(drv, cont_sel, 3) # Shorter wait, might not be needed if window scroll works
-            except TimeoutException:
-                # If container disappears maybe content loaded differently? Less critical now.
-                logging.warning("Could not find scroll container '%s' (might be okay if window scrolled)", cont_sel)
-                # Don't break immediately, let window scroll try
-                pass # Continue to scroll attempt
-
-
-        # Find card elements *within the container* in the current view
-        current_cards = []
-        if cont: # Only search if container was found
-            try:
-                current_cards = cont.find_elements(By.CSS_SELECTOR, card_sel)
-                logging.debug(f"Scroll attempt {scroll_attempt + 1}: Found {len(current_cards)} card elements in container.")
-            except StaleElementReferenceException:
-                logging.debug("Stale container reference during card search, attempting next scroll.")
-                time.sleep(0.5)
-                # Don't process, just try scrolling again
-            except WebDriverException as e:
-                 logging.warning("Error finding card elements: %s", e)
-                 # Don't process, try scrolling
-        else:
-             logging.debug("Container not found in this iteration, relying on window scroll.")
-
-
-        # Process elements found in the current view
-        found_new_this_iteration = False
-        for card_link_el in current_cards: # If current_cards is empty, this loop is skipped
-            href = None
-            try:
-                href = safe_get_attr(drv, card_link_el, "href")
-                if not href: continue
-
-                # Ensure URL is absolute for consistent tracking
-                full_href = href if href.startswith("http") else drv.current_url.split("/detail")[0] + href
-
-                # Check if we already processed this specific href in this range's scroll operation
-                if full_href not in processed_in_this_scroll:
-                     # Also double-check against the global dict, though processed_in_this_scroll should cover it for the current range
-                     if full_href not in all_cards_data:
-                        try:
-                            # Locate parent element containing metadata relative to the link
-                            # Using XPath ancestor is generally robust here
-                            parent_button = card_link_el.find_element(By.XPATH, "./ancestor::div[@role='button'][1]")
-                            num, title = extract_card_meta(parent_button)
-
-                            # Basic validation of extracted data
-                            if num != -1 or "Unknown" not in title:
-                                logging.debug("-> Extracted: Href=%s, Num=%d, Title=%s", full_href, num, title)
-                                all_cards_data[full_href] = (num, title)
-                                processed_in_this_scroll.add(full_href) # Mark as processed for this range
-                                newly_added_count += 1
-                                found_new_this_iteration = True # Mark that we found something new overall
-                            else:
-                                logging.warning("Metadata extraction failed for card with href %s (Num=%d, Title='%s')", full_href, num, title)
-                                processed_in_this_scroll.add(full_href) # Mark as processed even if extraction failed to avoid retrying
-
-                        except NoSuchElementException:
-                             logging.warning("Could not find ancestor button element for href %s. Structure might differ.", href)
-                             processed_in_this_scroll.add(full_href) # Mark as processed to avoid retrying
-                        except Exception as e:
-                            logging.warning("Error processing card details for href %s: %s", href, e)
-                            processed_in_this_scroll.add(full_href) # Mark as processed to avoid retrying
-                     else:
-                         # Already exists in global dict (e.g. from a previous range), mark as processed for this scroll too
-                         processed_in_this_scroll.add(full_href)
-
-            except StaleElementReferenceException:
-                logging.debug("Stale card link element encountered for href %s, skipping.", href)
-                continue # Skip this card, try others
-
-
-        # --- Attempt to scroll the WINDOW ---
-        try:
-            scroll_height_before = drv.execute_script("return document.body.scrollHeight;")
-            logging.debug(f"Scroll attempt {scroll_attempt + 1}: Scrolling window down from Y={current_scroll_y}...")
-            # Scroll down by 80% of the viewport height
-            drv.execute_script("window.scrollBy(0, window.innerHeight * 0.8);")
-            # Wait longer after scroll to allow content loading triggered by window scroll
-            time.sleep(2.0) # Increased wait time
-        except WebDriverException as e:
-             logging.warning("Error during window scrolling: %s", e)
-             break # Stop scrolling this range if it fails
-
-        # --- Check for Stagnancy based on scroll position ---
-        try:
-            new_scroll_y = drv.execute_script("return window.pageYOffset;")
-            scroll_height_after = drv.execute_script("return document.body.scrollHeight;")
-        except WebDriverException as e:
-             logging.warning("Could not get scroll position/height after scroll: %s. Stopping scroll.", e)
-             break
-
-        # Check if the total scrollable height increased (content loaded)
-        height_increased = scroll_height_after > scroll_height_before
-        # Check if the scroll position actually changed
-        scrolled_down = new_scroll_y > current_scroll_y + 5 # Use a small threshold
-
-        if scrolled_down or height_increased:
-            # If we scrolled down OR if new content loaded (increasing height), things are likely progressing.
-            stagnant_scroll_attempts = 0 # Reset stagnant counter
-            logging.debug(f"Scroll attempt {scroll_attempt+1}: Window scroll position changed to {new_scroll_y} or height increased. Progress likely.")
+    try:
+        # ~2.1 s per scroll step at worst, plus headroom
+        drv.set_script_timeout(max_scrolls * 3 + 30)
+        result = drv.execute_async_script(SCROLL_COLLECT_JS, cont_sel, card_sel, max_scrolls)
+    except WebDriverException as e:
+        logging.warning("In-page scroll/extract failed: %s", e)
+        return 0
+    logging.info("Scrolled %d time(s) (%s), %d cards seen.",
+                 result["scrolls"], result["reason"], len(result["rows"]))
+
+    # Parse card text in pure Python (hrefs are absolute and already unique)
+    for full_href, text in result["rows"]:
+        if full_href in all_cards_data:
+            continue # Already exists in global dict (e.g. from a previous range)
+
+        num, title = extract_card_meta(text)
+
+        # Basic validation of extracted data
+        if num != -1 or "Unknown" not in title:
+            logging.debug("-> Extracted: Href=%s, Num=%d, Title=%s", full_href, num, title)
+            all_cards_data[full_href] = (num, title)
+            newly_added_count += 1
         else:
-            # If we didn't scroll down AND the page height didn't increase...
-            # Double-check if we are already at the bottom
-            window_height = drv.execute_script("return window.innerHeight;")
-            if (new_scroll_y + window_height) >= scroll_height_after - 10: # Check if bottom is reached
-                logging.info(f"Scroll attempt {scroll_attempt+1}: Bottom of page likely reached (Y={new_scroll_y}, H={scroll_height_after}).")
-                break # Exit scroll loop
-
-            # Otherwise, increment stagnant counter
-            stagnant_scroll_attempts += 1
-            logging.debug(f"Scroll attempt {scroll_attempt+1}: Window scroll position ({new_scroll_y}) AND page height ({scroll_height_after}) did not change significantly. Stagnant count: {stagnant_scroll_attempts}")
-
-
-        if stagnant_scroll_attempts >= 5: # Stop after 5 consecutive attempts with no scroll change / height increase
-            logging.info("Scrolling stopped after %d stagnant scroll attempts.", stagnant_scroll_attempts)
-            break
-
+            logging.warning("Metadata extraction failed for card with href %s (Num=%d, Title='%s')", full_href, num, title)
 
     logging.info("Finished scrolling/extraction for this range. Total new items processed in this pass: %d", newly_added_count)
     return newly_added_count
 
 
 def collect_episode_links(drv: webdriver.Chrome) -> List[Tuple[int, str, str]]:
-    episode_range_button_sel = 'button[aria-label="Selected Item"]'
-    scroll_container_sel = 'div.ContentList_container__cV53J'
-    # Make card selector slightly more specific if possible, but keep it simple for now
-    card_sel = 'a.Card_link__M4ZXt[href]' # Ensure it has an href attribute
-
     labels = []
     dropdown = None
 
     # --- Get Episode Range Labels ---
     try:
-        dropdown = wait_css(drv, episode_range_button_sel, 10)
-        time.sleep(0.5)
+        dropdown = WebDriverWait(drv, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, RANGE_BUTTON_SEL))
+        )
         js_click(drv, dropdown)
-        time.sleep(1.0) # Wait for dropdown items
 
-        # Wait for options to be present
-        opts_container = WebDriverWait(drv, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'ul[role="listbox"]'))
-        )
+        # Wait for the listbox to be populated with at least one option
+        wait_css(drv, f'{LISTBOX_SEL} div[role="button"]', 10)
+        opts_container = drv.find_element(By.CSS_SELECTOR, LISTBOX_SEL)
         opts = opts_container.find_elements(By.CSS_SELECTOR, 'div[role="button"]')
         labels = [o.text.strip() for o in opts if o.text.strip()]
         labels = [lbl for lbl in labels if lbl.startswith("Episodios")] # Keep the filter
@@ -293,7 +358,7 @@ def collect_episode_links(drv: webdriver.Chrome) -> List[Tuple[int, str, str]]:
         # Try clicking the dropdown button again to close it
         try:
             js_click(drv, dropdown)
-            time.sleep(0.5)
+            wait_for(drv, EC.invisibility_of_element_located((By.CSS_SELECTOR, LISTBOX_SEL)), 2)
         except Exception:
             logging.debug("Could not click dropdown to close, maybe already closed.")
             pass # Continue anyway
@@ -313,30 +378,37 @@ def collect_episode_links(drv: webdriver.Chrome) -> List[Tuple[int, str, str]]:
         if dropdown and label != "current":
             logging.info("→ Selecting episode range: %s", label)
             try:
+                old_href = first_card_href(drv, SCROLL_CONTAINER_SEL, CARD_SEL)
+                shown = dropdown.text.strip() # Range currently on screen
                 # Click dropdown open
                 js_click(drv, dropdown)
-                time.sleep(0.8) # Wait a bit
 
-                # Find and click the specific option
-                xpath = f'//ul[@role="listbox"]//div[normalize-space(text())="{label}"]'
+                # Find and click the specific option (waits for the listbox to render)
                 opt = WebDriverWait(drv, 7).until(
-                    EC.element_to_be_clickable((By.XPATH, xpath))
+                    lambda d: find_by_text(d, f'{LISTBOX_SEL} div[role="button"]', label)
                 )
+                already_selected = (opt.get_attribute("aria-selected") == "true"
+                                    or shown == label)
                 js_click(drv, opt)
-                logging.info("Clicked range option '%s'. Waiting for content load...", label)
-                time.sleep(3.0) # Increase wait time after selection significantly
+                if already_selected:
+                    # Usually the first range: the list won't change, so don't wait for it to
+                    logging.info("Range '%s' is already shown.", label)
+                else:
+                    logging.info("Clicked range option '%s'. Waiting for content load...", label)
+                    if not wait_cards_changed(drv, old_href):
+                        logging.debug("Episode list did not visibly change after selecting '%s'.", label)
 
             except Exception as e:
                 logging.warning("Could not click range '%s': %s. Trying to close dropdown.", label, e)
                 # Attempt to close dropdown if clicking option failed
                 try: js_click(drv, dropdown)
                 except Exception: pass
-                time.sleep(0.5)
+                wait_for(drv, EC.invisibility_of_element_located((By.CSS_SELECTOR, LISTBOX_SEL)), 2)
                 continue # Skip this range if selection failed
 
         # --- Scroll and Extract Data for the Current Range ---
         logging.info("Processing container for range: '%s'", label)
-        scroll_and_extract_metadata(drv, scroll_container_sel, card_sel, all_cards_data, max_scrolls=60) # Increase max_scrolls too?
+        scroll_and_extract_metadata(drv, SCROLL_CONTAINER_SEL, CARD_SEL, all_cards_data, max_scrolls=60) # Increase max_scrolls too?
 
 
     # --- Final Sorting and Formatting ---
@@ -375,62 +447,521 @@ def collect_episode_links(drv: webdriver.Chrome) -> List[Tuple[int, str, str]]:
         logging.info("First few episodes found: %s", final_list[:5])
 
     return final_list
-def clear_perf_log(drv: webdriver.Chrome):
-    try:
-        drv.get_log("performance")
-    except Exception:
-        pass
 
-def capture_mpd(drv: webdriver.Chrome, timeout_sec: int = MPD_TIMEOUT) -> str | None:
-    deadline = time.time() + timeout_sec
-    while time.time() < deadline:
-        for entry in drv.get_log("performance"):
-            try:
-                msg = json.loads(entry["message"])["message"]
-                if msg.get("method") == "Network.requestWillBeSent":
-                    url = msg["params"]["request"]["url"]
-                    if ".mpd" in url.lower():
-                        return url
-            except Exception:
-                continue
-        time.sleep(0.3)
-    return None
+# Fetch.enable wildcard patterns for MPD manifest requests. Matching is
+# case-sensitive, so spell out every casing of "mpd" (.mpd, .MPD, .Mpd, …)
+MPD_URL_PATTERNS = [f"*.{m}{p}{d}*" for m in "mM" for p in "pP" for d in "dD"]
 
-def n_m3u8dl_re(mpd: str, out_stub: Path, lang: str, headers: dict[str, str]):
+class MpdSniffer:
+    """
+    Watches the page's requests over CDP on a background trio loop and
+    records the first .mpd request seen since the last reset(). Only .mpd
+    requests are reported by the browser (Fetch interception with a URL
+    pattern), so unrelated traffic never reaches Python.
+    With stop_loading, the page is stopped right there, so a pending
+    drv.get() returns without waiting for the rest of the page.
+    """
+    def __init__(self, drv: webdriver.Chrome, stop_loading: bool = False):
+        self._drv = drv
+        self._stop_loading = stop_loading
+        self._url: str | None = None
+        # Manifests already claimed by an episode, by URL without query string;
+        # shared between the trio listener and the worker thread, hence the lock
+        self._claimed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._found = threading.Event()
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, name="mpd-sniffer", daemon=True).start()
+        if not self._ready.wait(15):
+            logging.warning("CDP request listener did not start in time – MPD capture may miss requests.")
+
+    def _run(self):
+        try:
+            trio.run(self._listen)
+        except Exception as e:
+            # Without it every episode would just wait out MPD_TIMEOUT and end NO_MPD
+            logging.error("CDP request listener stopped – no MPDs will be captured: %s", e)
+        finally:
+            self._ready.set() # Never leave __init__ waiting on a dead listener
+
+    async def _listen(self):
+        async with self._drv.bidi_connection() as conn:
+            session, devtools = conn.session, conn.devtools
+            events = session.listen(devtools.fetch.RequestPaused, buffer_size=64)
+            await session.execute(devtools.fetch.enable(patterns=[
+                devtools.fetch.RequestPattern(url_pattern=p) for p in MPD_URL_PATTERNS
+            ]))
+            self._ready.set()
+            async for event in events:
+                # Paused requests must always be released, hit or not
+                try:
+                    await session.execute(devtools.fetch.continue_request(request_id=event.request_id))
+                except Exception as e:
+                    logging.debug("Fetch.continueRequest failed: %s", e)
+                url = event.request.url
+                key = urlsplit(url)._replace(query="", fragment="").geturl()
+                with self._lock:
+                    hit = not self._found.is_set() and key not in self._claimed
+                    if hit:
+                        self._claimed.add(key)
+                        self._url = url
+                        self._found.set()
+                if hit and self._stop_loading:
+                    try:
+                        await session.execute(devtools.page.stop_loading())
+                    except Exception as e:
+                        logging.debug("Page.stopLoading failed: %s", e)
+
+    def reset(self):
+        """
+        Forget any previous hit; call right before navigating to a new episode.
+        Earlier hits stay ignored (whatever their query string), so a late
+        request from a previous episode's player can't pass for the new
+        episode's MPD.
+        """
+        with self._lock:
+            self._url = None
+            self._found.clear()
+
+    def wait(self, timeout_sec: float = MPD_TIMEOUT) -> str | None:
+        """Block until an .mpd request is seen (or the timeout expires)."""
+        return self._url if self._found.wait(timeout_sec) else None
+
+def n_m3u8dl_re(mpd: str, out_stub: Path, lang: str, headers: dict[str, str],
+                threads: int = DL_THREADS) -> subprocess.Popen:
+    """Starts the download in the background; the caller waits on the process."""
     hdr = sum([["--header", f"{k}: {v}"] for k, v in headers.items()], [])
     cmd = [
         "N_m3u8DL-RE", mpd,
         "--save-dir", str(out_stub.parent),
         "--save-name", out_stub.name,
-        "--thread-count", "8",
+        "--thread-count", str(threads),
         "-sv", "best",
         "-sa", f"best:lang={lang}",
         "-ss", lang,
         "--del-after-done"
     ] + hdr
-    return run(cmd)
+    return spawn(cmd)
+
+def _srt_time(ts: str) -> str:
+    # VTT may omit the hours ("mm:ss.ttt"); SRT needs "hh:mm:ss,ttt"
+    if ts.count(":") == 1:
+        ts = "00:" + ts
+    return ts.replace(".", ",")
 
-def convert_vtt(vtt: Path, srt: Path):
-    if vtt.exists():
-        run(["ffmpeg", "-y", "-i", str(vtt), str(srt)])
-        vtt.unlink(missing_ok=True)
+def convert_vtt(vtt: Path, srt: Path) -> bool:
+    """
+    WebVTT -> SRT in-process: it's a plain text rewrite, so no ffmpeg spawn.
+    Returns whether an SRT was written; the VTT is left in place when it
+    holds no cues. Raises FileNotFoundError if there is no VTT.
+    """
+    cues = []
+    for block in _VTT_BLOCK_SEP.split(vtt.read_text(encoding="utf-8-sig")):
+        lines = block.strip("\n").splitlines()
+        # Cue identifiers precede the timing line; WEBVTT header / NOTE / STYLE blocks have none
+        for i, line in enumerate(lines):
+            m = _VTT_TIMING.match(line)
+            if m:
+                break
+        else:
+            continue
+        text = _VTT_TAG.sub("", _VTT_CLASSED.sub(r"<\1>", "\n".join(lines[i + 1:])))
+        text = html.unescape(text).strip() # &amp; &lt; &gt; … are VTT escapes, SRT is plain text
+        if text:
+            cues.append(f"{len(cues) + 1}\n{_srt_time(m.group(1))} --> {_srt_time(m.group(2))}\n{text}\n")
+    if not cues:
+        return False
+    part = srt.with_name(srt.name + ".part") # Leftovers are removed by clean_partials()
+    part.write_text("\n".join(cues), encoding="utf-8")
+    os.replace(part, srt) # An .srt that exists is always complete
+    vtt.unlink(missing_ok=True)
+    return True
 
 ###############################################################################
 # --------------------------- resume helpers ------------------------------- #
 ###############################################################################
+def clean_partials(out_dir: Path):
+    """Drops what an interrupted run left half-written; those episodes are redone."""
+    # Only what we write ourselves – --out may be a directory with other people's files
+    shutil.rmtree(out_dir / PART_DIR, ignore_errors=True)
+    for f in out_dir.glob("*.srt.part"):
+        f.unlink(missing_ok=True)
+
 def previously_done(out_dir: Path, titles_csv: Path) -> Set[str]:
     done: Set[str] = set()
     if titles_csv.exists():
         with titles_csv.open(newline="", encoding="utf-8") as f:
-            for row in csv.reader(f):
-                if row:
-                    done.add(row[0].upper())
-    for f in out_dir.glob("*.mp4"):
-        m = re.search(r"(S\d{2}E\d{3})", f.stem, re.I)
-        if m:
-            done.add(m.group(1).upper())
+            # Titles may hold quoted newlines, so rows != lines – let csv split them
+            done.update(row[0].upper() for row in csv.reader(f) if row)
+    # One directory sweep. is_file() usually comes free with the listing (d_type);
+    # stat() still costs a syscall on POSIX, so it only runs for .mp4 files.
+    # Empty .mp4s are leftovers from interrupted runs, not finished episodes.
+    with os.scandir(out_dir) as entries:
+        done.update(
+            m.group(1).upper()
+            for e in entries
+            if e.name.endswith(".mp4") and e.is_file() and e.stat().st_size > 0
+            for m in [_SEASON_EP.search(e.name)] if m
+        )
     return done
 
+###############################################################################
+# --------------------------- workers -------------------------------------- #
+###############################################################################
+# One job per episode: (ep_code, ep_title, link, base_filename)
+Job = Tuple[str, str, str, str]
+# Worker result: (job with the page's title, mpd, request headers, failure code if no mpd)
+Scraped = Tuple[Job, "str | None", "dict[str, str]", str]
+# Running download: (ep_code, ep_title, link, base_stub, N_m3u8DL-RE process)
+Download = Tuple[str, str, str, Path, subprocess.Popen]
+
+def setup_logging(debug: bool, log_q):
+    # Every process only enqueues records; the parent's listener does the writing
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG if debug else logging.INFO)
+    root.handlers = [QueueHandler(log_q)]
+
+def start_log_listener(log_q) -> QueueListener:
+    """Single thread that formats and prints the records of all processes."""
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(asctime)s %(levelname)5s : %(message)s"))
+    listener = QueueListener(log_q, console)
+    listener.start()
+    return listener
+
+# Per-process browser state, created once by _init_worker
+_DRV: webdriver.Chrome | None = None
+_SNIFFER: MpdSniffer | None = None
+_UA = ""
+_LAST_NAV = None # Shared mp.Value: time.monotonic() of the latest navigation by any worker
+_SPA_NAV = True # Cleared after the first client-side route change that yields no MPD
+
+def _init_worker(args: argparse.Namespace, log_q, last_nav):
+    """Pool initializer: each worker process owns one Chrome for its whole life."""
+    global _DRV, _SNIFFER, _UA, _LAST_NAV
+    _LAST_NAV = last_nav
+    setup_logging(args.debug, log_q)
+    _DRV = make_driver(args.headless)
+    # Quit Chrome when the pool shuts this worker down
+    Finalize(None, _DRV.quit, exitpriority=10)
+    block_heavy_resources(_DRV)
+    _SNIFFER = MpdSniffer(_DRV, stop_loading=True)
+    # Invariant for the browser's lifetime – read it once, not per episode
+    _UA = _DRV.execute_script("return navigator.userAgent;")
+
+def process_episode(job: Job) -> Scraped:
+    """
+    Runs in a worker process: navigates to one episode and captures its MPD
+    and request headers. The download itself is started by the parent, so
+    this browser is free for the next episode straight away.
+    """
+    global _SPA_NAV
+    ep_code, ep_title, link, base_filename = job
+
+    # At most one navigation per MIN_INTERVAL across all browsers; only sleeps if
+    # the previous one was recent. Holding the lock queues the other workers behind us.
+    with _LAST_NAV.get_lock():
+        delay = MIN_INTERVAL - (time.monotonic() - _LAST_NAV.value)
+        if delay > 0:
+            time.sleep(delay)
+        _LAST_NAV.value = time.monotonic()
+
+    _SNIFFER.reset()
+    logging.info("=== Processing Ep %s ('%s') ===", ep_code, ep_title)
+
+    # Let the already-loaded app route to the episode client-side; only a
+    # player that actually requests the MPD counts as success
+    soft_nav = False
+    if _SPA_NAV and spa_navigate(_DRV, link):
+        soft_nav = _SNIFFER.wait(SPA_NAV_TIMEOUT) is not None
+        if not soft_nav:
+            # Won't work any better for the next episode; stop paying the timeout
+            logging.info("Client-side navigation gave no MPD; using full page loads from now on.")
+            _SPA_NAV = False
+    if soft_nav:
+        logging.info("Navigated client-side to: %s", link)
+    else:
+        _SNIFFER.reset()
+        logging.info("Navigating to: %s", link)
+        try:
+            _DRV.get(link) # Returns early if the _SNIFFER already saw the .mpd and stopped the page
+            # Earliest sign the player booted – or no wait at all if the MPD is already in
+            WebDriverWait(_DRV, 15, poll_frequency=0.2).until(
+                lambda d: _SNIFFER.wait(0) or d.execute_script(PLAYER_READY_JS)
+            )
+        except TimeoutException:
+            # Page load / player selector are only hints; the MPD request below is what counts
+            logging.warning("Episode page not ready in time: %s – still waiting for the MPD.", link)
+        except WebDriverException as e:
+            logging.error("WebDriverException loading episode page %s: %s", link, e)
+            return job, None, {}, "PAGE_LOAD_FAIL"
+
+
+    # --- Optional: Sanity check page title again ---
+    # Skipped after client-side routing: the heading may still be the previous episode's
+    if not soft_nav:
+        try:
+            # Page may have been stopped before the heading rendered – don't linger then
+            watch_title_el = wait_css(_DRV, "h1,h2", 1 if _SNIFFER.wait(0) else 5)
+            watch_title = watch_title_el.text.strip()
+            if watch_title and ascii_fold(watch_title.lower()) not in ascii_fold(ep_title.lower()):
+                logging.warning("⚠️ Page title '%s' differs from collected title '%s'. Using page title.", watch_title, ep_title)
+                ep_title = watch_title # Update title if different
+                # Re-generate filename if title changed significantly? Optional.
+                # if ep_num == -1: base_filename = slug(f"{series_title}.UNK_{slug(ep_title[:30])}")
+        except Exception as e:
+            logging.debug("Could not verify page title: %s", e)
+            pass
+    # -----------------------------------------------
+
+    mpd = _SNIFFER.wait(MPD_TIMEOUT) # Returns as soon as the .mpd request is seen
+    if not mpd:
+        logging.error("NO_MPD found for %s ('%s') at %s", ep_code, ep_title, link)
+        return job, None, {}, "NO_MPD"
+    logging.info("MPD found: %s", mpd)
+
+    headers = {
+        "User-Agent": _UA,
+        "Referer": _DRV.current_url # Use the current episode page as referer
+    }
+    return (ep_code, ep_title, link, base_filename), mpd, headers, ""
+
+def start_download(scraped: Scraped, args: argparse.Namespace, results) -> Download | None:
+    """
+    Starts N_m3u8DL-RE for a scraped episode. Returns the running download,
+    or None after reporting a failure as ("fail", log_line). Raises
+    FileNotFoundError if the downloader is missing.
+    """
+    (ep_code, ep_title, link, base_filename), mpd, headers, reason = scraped
+    if not mpd:
+        results.put(("fail", f"{ep_code},{link},{reason}\n"))
+        return None
+
+    base_stub = args.out / base_filename # Use the generated filename
+    logging.info("Starting download for %s to %s.mp4", ep_code, base_stub)
+    # Ensure N_m3u8DL-RE path is correct or in system PATH (FileNotFoundError propagates)
+    try:
+        # Own directory per download, so publishing one never picks up another's files
+        proc = n_m3u8dl_re(mpd, args.out / PART_DIR / base_filename / base_filename,
+                           args.lang, headers, args.dl_threads)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        logging.error("Exception during download process for %s: %s", ep_code, e)
+        results.put(("fail", f"{ep_code},{link},DL_EXCEPTION\n"))
+        return None
+    return ep_code, ep_title, link, base_stub, proc
+
+def finish_download(dl: Download, args: argparse.Namespace, results, subs: ThreadPoolExecutor) -> Future | None:
+    """
+    Waits for a running download and records its outcome. On success the
+    subtitle conversion is queued on `subs` and its future returned.
+    """
+    ep_code, ep_title, link, base_stub, proc = dl
+    dl_ret_code = proc.wait()
+    if dl_ret_code != 0:
+        logging.error("N_m3u8DL-RE failed (code %d) for %s", dl_ret_code, link)
+        results.put(("fail", f"{ep_code},{link},DL_FAIL_CODE_{dl_ret_code}\n"))
+        # Partial files stay in PART_DIR for inspection until the next run
+        return None
+
+    # --- DOWNLOAD SUCCEEDED ---
+    logging.info("Download command completed successfully for %s", ep_code)
+    try:
+        published = publish_download(base_stub)
+    except OSError as e:
+        logging.error("Could not move %s into %s: %s", ep_code, base_stub.parent, e)
+        published = False
+    if not published:
+        logging.error("N_m3u8DL-RE exited cleanly but left no %s.mp4 for %s", base_stub.name, link)
+        results.put(("fail", f"{ep_code},{link},NO_OUTPUT\n"))
+        return None
+
+    # --- RECORD SUCCESS IMMEDIATELY ---
+    # Sent now that download is confirmed complete, regardless of subtitle outcome.
+    results.put(("ok", [ep_code, ep_title, base_stub.name + ".mp4"])) # Record MP4 filename
+    logging.info("✔ Successfully recorded download for %s ('%s')", ep_code, ep_title)
+    # --- END RECORD SUCCESS ---
+
+
+    # --- QUEUE SUBTITLE CONVERSION (AFTER SUCCESSFUL DOWNLOAD IS RECORDED) ---
+    # Runs on the conversion pool so the next download isn't held up by it
+    return subs.submit(convert_subs, ep_code, base_stub, args.lang)
+
+def publish_download(base_stub: Path) -> bool:
+    """
+    Atomically moves an episode's finished files from its PART_DIR
+    subdirectory into the output dir. Returns False, moving nothing, if
+    the download produced no .mp4.
+    """
+    part_dir = base_stub.parent / PART_DIR / base_stub.name
+    mp4 = base_stub.name + ".mp4"
+    try:
+        files = [f for f in part_dir.iterdir() if f.is_file()]
+    except FileNotFoundError:
+        return False
+    if not any(f.name == mp4 for f in files):
+        return False
+    # Same filesystem, so each os.replace is a rename: a file in --out is always complete.
+    # The .mp4 goes last – once it's there, resume treats the episode as done.
+    for f in sorted(files, key=lambda f: f.name == mp4):
+        os.replace(f, base_stub.parent / f.name)
+    shutil.rmtree(part_dir, ignore_errors=True)
+    return True
+
+def convert_subs(ep_code: str, base_stub: Path, lang: str):
+    """Converts an episode's VTT to SRT if one was downloaded; raises on failure."""
+    # with_suffix() would replace the ".S01E001" part of the stub
+    vtt_file = base_stub.with_name(f"{base_stub.name}.{lang}.vtt")
+    srt_file = base_stub.with_name(f"{base_stub.name}.{lang}.srt")
+    vtt_name = vtt_file.name
+    for attempt in range(SUB_RETRIES):
+        try:
+            # Opening the VTT is the existence check – no separate stat()
+            converted = convert_vtt(vtt_file, srt_file)
+            break
+        except FileNotFoundError as e:
+            if e.filename != str(vtt_file):
+                raise # Something other than the source went missing – that's a failure
+            logging.info("No VTT subtitle found for %s (file %s missing). Skipping conversion.", ep_code, vtt_name)
+            return
+        except OSError as e:
+            # Transient I/O (file still held by the downloader, EINTR…); bad content isn't retried
+            if attempt == SUB_RETRIES - 1:
+                raise
+            logging.warning("Subtitle conversion retry %d for %s: %s", attempt + 1, ep_code, e)
+            time.sleep(2 ** attempt)
+    if converted:
+        logging.info("Subtitle conversion successful for %s.", ep_code)
+    else:
+        # The VTT held no cues; it is kept for inspection
+        logging.warning("Subtitle conversion attempted for %s, but no cues were found in %s.", ep_code, vtt_name)
+
+def run_downloads(download_q: queue.Queue, args: argparse.Namespace, results,
+                  subs: ThreadPoolExecutor, conversions: List[Tuple[str, str, Future]],
+                  fatal: threading.Event):
+    """
+    Download stage: starts N_m3u8DL-RE for each scraped episode taken off
+    `download_q` as soon as one of the --max-downloads slots is free, and
+    hands finished ones, in whatever order they finish, to the conversion
+    pool. Stops on a None sentinel.
+    """
+    inflight: List[Download] = []
+
+    def finish(dl: Download):
+        try:
+            fut = finish_download(dl, args, results, subs)
+        except Exception as e:
+            logging.error("Could not finish download: %s", e)
+            return
+        if fut:
+            conversions.append((dl[0], dl[2], fut))
+
+    try:
+        while True:
+            # Reap every download that has ended, not just the oldest one
+            for dl in [dl for dl in inflight if dl[4].poll() is not None]:
+                inflight.remove(dl)
+                finish(dl)
+            if len(inflight) >= args.max_downloads:
+                time.sleep(DL_POLL)
+                continue
+            try:
+                scraped = download_q.get(timeout=DL_POLL)
+            except queue.Empty:
+                continue
+            if scraped is None:
+                break
+            if fatal.is_set():
+                continue # Keep draining so the scrape stage never blocks on put()
+            try:
+                dl = start_download(scraped, args, results)
+            except FileNotFoundError:
+                logging.error("FATAL: 'N_m3u8DL-RE' command not found. Make sure it's installed and in your PATH.")
+                # No point continuing if downloader is missing for all episodes
+                fatal.set()
+                continue
+            if dl:
+                inflight.append(dl)
+    finally:
+        # Downloads run independently of the browsers; record whatever they end with
+        for dl in inflight:
+            finish(dl)
+
+def download_all(jobs: List[Job], args: argparse.Namespace, workers: int, results, log_q):
+    """
+    Runs the scrape -> download -> convert pipeline: browser processes
+    scrape episodes, a downloader thread runs N_m3u8DL-RE and a thread
+    pool converts subtitles, all at the same time. The small download
+    queue keeps the scrapers from racing ahead, so a captured MPD URL
+    only waits for the next free download slot.
+    """
+    pending = iter(jobs)
+    download_q: queue.Queue = queue.Queue(maxsize=2)
+    conversions: List[Tuple[str, str, Future]] = []
+    fatal = threading.Event()
+
+    ctx = mp.get_context("spawn")
+    last_nav = ctx.Value("d", 0.0) # Pacing is global, not per browser
+    with ThreadPoolExecutor(args.sub_workers, thread_name_prefix="subs") as subs, \
+         ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(args, log_q, last_nav)) as ex:
+        downloader = threading.Thread(target=run_downloads, name="downloader",
+                                      args=(download_q, args, results, subs, conversions, fatal))
+        downloader.start()
+        running = {ex.submit(process_episode, job): job for job in islice(pending, workers)}
+        try:
+            while running and not fatal.is_set():
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    ep_code, _, link, _ = running.pop(fut)
+                    try:
+                        download_q.put(fut.result()) # Blocks while the download stage is backed up
+                    except Exception as e:
+                        logging.error("Worker failed on %s: %s", ep_code, e)
+                        results.put(("fail", f"{ep_code},{link},WORKER_FAIL\n"))
+                    job = next(pending, None)
+                    if job:
+                        running[ex.submit(process_episode, job)] = job
+            if fatal.is_set():
+                ex.shutdown(wait=True, cancel_futures=True)
+        finally:
+            download_q.put(None)
+            downloader.join()
+            # Conversions drain in the background; wait for them and collect their outcomes last
+            for ep_code, link, fut in conversions:
+                try:
+                    fut.result()
+                except Exception as e:
+                    logging.error("Error during subtitle conversion for %s: %s", ep_code, e)
+                    results.put(("fail", f"{ep_code},{link},SUB_FAIL\n"))
+
+def record_results(results, writer, titles, fails, linger: float = 0.2):
+    """
+    Single consumer for worker outcomes so titles.csv / failures.log lines
+    never interleave. Results arriving within `linger` seconds of each other
+    are written as one batch with a single flush, and only to files that
+    the batch touched. Stops on a None sentinel.
+    """
+    stop = False
+    while not stop:
+        batch = [results.get()]
+        time.sleep(linger) # Let a burst of results pile up before flushing
+        while True:
+            try:
+                batch.append(results.get_nowait())
+            except queue.Empty:
+                break
+        rows = [row for kind, row in filter(None, batch) if kind == "ok"]
+        lines = [row for kind, row in filter(None, batch) if kind != "ok"]
+        stop = None in batch
+        if rows:
+            writer.writerows(rows)
+            titles.flush()
+        if lines:
+            fails.writelines(lines)
+            fails.flush()
+
 ###############################################################################
 # --------------------------- main ----------------------------------------- #
 ###############################################################################
@@ -441,12 +972,25 @@ def main():
     ap.add_argument("--lang", default="es")
     ap.add_argument("--out", type=Path, default=Path.cwd())
     ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Episodes scraped in parallel, one Chrome each (default 1, capped at CPU count)")
+    ap.add_argument("--max-downloads", type=int, default=None,
+                    help="Downloads running at once while further episodes are scraped (default 2 per worker)")
+    ap.add_argument("--dl-threads", type=int, default=DL_THREADS,
+                    help=f"Segments fetched concurrently per download (default {DL_THREADS})")
+    ap.add_argument("--sub-workers", type=int, default=SUB_WORKERS,
+                    help=f"Subtitle conversions running at once (default {SUB_WORKERS})")
     ap.add_argument("--debug", action="store_true", help="Enable debug logging") # Add debug flag
     args = ap.parse_args()
+    args.workers = max(1, min(args.workers, os.cpu_count() or 1))
+    args.max_downloads = max(1, args.max_downloads or 2 * args.workers)
+    args.sub_workers = max(1, args.sub_workers)
+    args.dl_threads = max(1, args.dl_threads)
 
-    log_level = logging.DEBUG if args.debug else logging.INFO # Set level based on flag
-    logging.basicConfig(level=log_level,
-                        format="%(asctime)s %(levelname)5s : %(message)s")
+    # Shared with the worker processes, so it has to be a multiprocessing queue
+    log_q = mp.get_context("spawn").Queue()
+    setup_logging(args.debug, log_q)
+    log_listener = start_log_listener(log_q)
 
     args.out.mkdir(parents=True, exist_ok=True)
     # Use output dir for resume files for better organization
@@ -458,11 +1002,14 @@ def main():
         logging.info("Resuming – %d episodes already tracked or downloaded", len(done_eps))
 
     drv = None # Initialize drv to None
-    fails = fails_path.open("a", encoding="utf-8", newline="")
-    titles = titles_csv.open("a", newline="", encoding="utf-8")
+    # Only record_results writes these; it flushes once per batch
+    fails = fails_path.open("a", encoding="utf-8", newline="", buffering=WRITE_BUFFER)
+    titles = titles_csv.open("a", newline="", encoding="utf-8", buffering=WRITE_BUFFER)
     writer = csv.writer(titles)
 
     try:
+        clean_partials(args.out)
+        (args.out / PART_DIR).mkdir(exist_ok=True)
         drv = make_driver(args.headless)
         drv.get(args.url)
         # Wait for page title or a known element before proceeding
@@ -483,10 +1030,15 @@ def main():
         eps = collect_episode_links(drv) # Use the modified function
         logging.info("%d unique episodes collected for download.", len(eps))
 
+        # Workers bring their own browsers; free this one before they start
+        drv.quit()
+        drv = None
+
         if not eps:
              logging.warning("No episodes collected. Exiting.")
              return
 
+        jobs: List[Job] = []
         for ep_num, ep_title, link in eps:
             # Generate ep_code, handle -1 case carefully
             if ep_num != -1:
@@ -507,126 +1059,22 @@ def main():
                  logging.warning("Skipping potentially malformed relative link: %s", link)
                  continue
 
-            clear_perf_log(drv)
-            logging.info("=== Processing Ep %s ('%s') ===", ep_code, ep_title)
-            logging.info("Navigating to: %s", link)
-            try:
-                drv.get(link)
-                # Add a wait after navigation for the player/page elements to load
-                WebDriverWait(drv, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "h1, h2")) # Wait for title element again
-                )
-                time.sleep(2) # Extra buffer
-            except TimeoutException:
-                logging.error("Timeout loading episode page: %s", link)
-                fails.write(f"{ep_code},{link},PAGE_LOAD_TIMEOUT\n"); fails.flush()
-                continue
-            except WebDriverException as e:
-                 logging.error("WebDriverException loading episode page %s: %s", link, e)
-                 fails.write(f"{ep_code},{link},PAGE_LOAD_FAIL\n"); fails.flush()
-                 continue
-
-
-            # --- Optional: Sanity check page title again ---
-            try:
-                watch_title_el = wait_css(drv, "h1,h2", 5) # Reduced wait
-                watch_title = watch_title_el.text.strip()
-                if watch_title and unidecode(watch_title.lower()) not in unidecode(ep_title.lower()):
-                    logging.warning("⚠️ Page title '%s' differs from collected title '%s'. Using page title.", watch_title, ep_title)
-                    ep_title = watch_title # Update title if different
-                    # Re-generate filename if title changed significantly? Optional.
-                    # if ep_num == -1: base_filename = slug(f"{series_title}.UNK_{slug(ep_title[:30])}")
-            except Exception as e:
-                 logging.debug("Could not verify page title: %s", e)
-                 pass
-            # -----------------------------------------------
-
-            mpd = capture_mpd(drv, timeout_sec=MPD_TIMEOUT) # Use existing function
-            if not mpd:
-                logging.error("NO_MPD found for %s ('%s') at %s", ep_code, ep_title, link)
-                fails.write(f"{ep_code},{link},NO_MPD\n"); fails.flush()
-                continue
-            logging.info("MPD found: %s", mpd)
-
-            base_stub = args.out / base_filename # Use the generated filename
-            headers = {
-                "User-Agent": drv.execute_script("return navigator.userAgent;"),
-                "Referer": drv.current_url # Use the current episode page as referer
-            }
-
-            logging.info("Starting download for %s to %s", ep_code, base_stub.with_suffix(".mp4"))
-            # Ensure N_m3u8DL-RE path is correct or in system PATH
-            try:
-                dl_ret_code = n_m3u8dl_re(mpd, base_stub, args.lang, headers)
-                if dl_ret_code != 0:
-                    logging.error("N_m3u8DL-RE failed (code %d) for %s", dl_ret_code, link)
-                    fails.write(f"{ep_code},{link},DL_FAIL_CODE_{dl_ret_code}\n"); fails.flush()
-            # Clean up potentially partial files, BUT KEEP the final MP4 if it exists
-                    logging.warning("Download command failed (code %d). Attempting cleanup, but preserving MP4 if found.", dl_ret_code)
-                    final_mp4_path = base_stub.with_suffix(".mp4") # Define the target file path
-                    final_m4a = base_stub.with_suffix(".m4a").resolve()
-                    #try:
-                    #    for f in args.out.glob(f"{base_stub.name}*"):
-                    #        # Resolve paths to compare apples-to-apples (absolute paths)
-                    #        if f.resolve() != final_mp4_path.resolve():
-                    #            logging.debug("Cleaning up non-final/temp file: %s", f.name)
-                    #            f.unlink(missing_ok=True)
-                    #        else:
-                    #            logging.info("Keeping potentially completed file despite error: %s", f.name)
-                    #except Exception as cleanup_e:
-                    #    logging.error("Error during cleanup attempt: %s", cleanup_e)
-                    continue # Skip to next episode on download failure
-                else:
-                    # --- DOWNLOAD SUCCEEDED ---
-                    logging.info("Download command completed successfully for %s", ep_code)
-
-                    # --- RECORD SUCCESS IMMEDIATELY ---
-                    # Write success record now that download is confirmed complete.
-                    # This happens regardless of subtitle outcome.
-                    writer.writerow([ep_code, ep_title, base_stub.name + ".mp4"]) # Record MP4 filename
-                    titles.flush()
-                    done_eps.add(ep_code.upper()) # Add to runtime set to prevent re-download if script restarts quickly
-                    logging.info("✔ Successfully recorded download for %s ('%s')", ep_code, ep_title)
-                    # --- END RECORD SUCCESS ---
-
-            except FileNotFoundError:
-                logging.error("FATAL: 'N_m3u8DL-RE' command not found. Make sure it's installed and in your PATH.")
-                # No point continuing if downloader is missing for all episodes
-                return # Exit script
-            except Exception as e:
-                logging.error("Exception during download process for %s: %s", ep_code, e)
-                fails.write(f"{ep_code},{link},DL_EXCEPTION\n"); fails.flush()
-                # Decide if you want to clean up potential partial files here too
-                # for f in args.out.glob(f"{base_stub.name}*"): f.unlink(missing_ok=True)
-                continue # Skip to next episode on other download exceptions
-
-
-            # --- ATTEMPT SUBTITLE CONVERSION (AFTER SUCCESSFUL DOWNLOAD IS RECORDED) ---
-            # This section now runs independently of the success logging for the download itself.
-            vtt_file = base_stub.with_suffix(f".{args.lang}.vtt")
-            srt_file = base_stub.with_suffix(f".{args.lang}.srt")
-            if vtt_file.exists():
-                logging.info("Attempting VTT->SRT conversion for %s...", ep_code)
-                try:
-                    # Optional: You could check the return code from convert_vtt if run() was modified to return it
-                    convert_vtt(vtt_file, srt_file)
-                    if srt_file.exists():
-                         logging.info("Subtitle conversion successful for %s.", ep_code)
-                    else:
-                         # This might happen if ffmpeg failed internally but didn't raise an exception via run()
-                         logging.warning("Subtitle conversion attempted for %s, but SRT file not found afterwards. Check ffmpeg output/logs if needed.", ep_code)
-                         # Keep the VTT if conversion fails? Or log error to fails.log?
-                         # fails.write(f"{ep_code},{link},SUB_CONVERT_FAIL\n"); fails.flush()
-                except Exception as e:
-                     logging.error("Error during subtitle conversion for %s: %s", ep_code, e)
-                     # Log this specific failure too?
-                     # fails.write(f"{ep_code},{link},SUB_CONVERT_EXCEPTION\n"); fails.flush()
-            else:
-                logging.info("No VTT subtitle found for %s (file %s missing). Skipping conversion.", ep_code, vtt_file.name)
-            # --- END SUBTITLE CONVERSION ---
+            jobs.append((ep_code, ep_title, link, base_filename))
 
+        workers = min(args.workers, len(jobs))
+        if not workers:
+            logging.info("Nothing left to download.")
+            return
+        logging.info("Downloading %d episodes with %d worker(s).", len(jobs), workers)
 
-            time.sleep(2) # Small delay before next episode
+        results: queue.Queue = queue.Queue()
+        recorder = threading.Thread(target=record_results, args=(results, writer, titles, fails))
+        recorder.start()
+        try:
+            download_all(jobs, args, workers, results, log_q)
+        finally:
+            results.put(None)
+            recorder.join()
 
     except KeyboardInterrupt:
         logging.warning("Keyboard interrupt detected. Exiting.")
@@ -641,7 +1089,8 @@ def main():
         if titles:
             titles.close()
         logging.info("Script finished.")
+        log_listener.stop()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()